@@ -6,10 +6,29 @@ import os
 import sys
 import time
 import json
+import math
 import logging
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import paho.mqtt.client as mqtt
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import websocket
+    WEBSOCKET_AVAILABLE = True
+except ImportError:
+    WEBSOCKET_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(
     level=logging.DEBUG if os.getenv('DEBUG_LOGGING', 'false').lower() == 'true' else logging.INFO,
@@ -21,67 +40,231 @@ logger = logging.getLogger(__name__)
 # Home Assistant supervisor token for API access
 SUPERVISOR_TOKEN = os.getenv('SUPERVISOR_TOKEN', '')
 HA_API_URL = 'http://supervisor/core/api'
+STATES_URL = HA_API_URL + '/states'
+SERVICES_URL = HA_API_URL + '/services/'
+TEMPLATE_URL = HA_API_URL + '/template'
+HA_WEBSOCKET_URL = 'ws://supervisor/core/websocket'
+
+# Renders the requested entities as a JSON list shaped like the /api/states response. Entities are
+# selected rather than expanded, so a group used as the boiler is returned itself instead of its members.
+STATES_TEMPLATE = (
+    "[{% for s in states | selectattr('entity_id', 'in', entity_ids) %}"
+    '{"entity_id": {{ s.entity_id | to_json }}, "state": {{ s.state | to_json }}, '
+    '"attributes": {{ s.attributes | to_json }}}{% if not loop.last %},{% endif %}'
+    '{% endfor %}]'
+)
+HTTP_POOL_SIZE = 8
+HTTP_FANOUT_WORKERS = 4  # Concurrent requests when falling back to per-entity fetches
+# (connect, read) timeouts in seconds; service calls may wait on the device, so allow a longer read
+HTTP_TIMEOUT = (1.0, 5.0)
+SERVICE_TIMEOUT = (1.0, 10.0)
+
+# Shared HTTP session so every API call reuses a pooled keep-alive connection
+SESSION = requests.Session()
+SESSION.headers.update({
+    'Authorization': f'Bearer {SUPERVISOR_TOKEN}',
+    'Content-Type': 'application/json',
+})
+# Retry briefly when Home Assistant is restarting or the Supervisor proxy returns a gateway error.
+# Read timeouts are not retried: the request may still be processed, and service calls such as
+# turning the boiler on are not safe to repeat (nor worth stalling the loop for another read timeout).
+HTTP_RETRY = Retry(
+    total=2,
+    read=0,
+    backoff_factor=0.2,
+    status_forcelist=(500, 502, 503, 504),
+    allowed_methods=frozenset(('GET', 'POST')),
+    raise_on_status=False
+)
+SESSION.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=HTTP_RETRY))
+
+# Default options, matching config.yaml
+DEFAULTS = {
+    'debug_logging': False,
+    'trv_entities': [],
+    'boiler_entity': '',
+    'boiler_mode': 'thermostat',
+    'manual_on_temperature': 21,
+    'manual_off_temperature': 14,
+    'check_valve_state': True,
+    'ignore_hvac_action': False,
+    'ignore_above_target': False,
+    'min_valve_position_threshold': 0,
+    'min_trvs_heating': 1,
+    'use_dynamic_temperature': True,
+    'polling_interval': 300,
+    'mqtt_host': 'core-mosquitto',
+    'mqtt_port': 1883,
+    'mqtt_user': '',
+    'mqtt_password': ''
+}
+
+# Sensor entity ID patterns tried for each TRV, in order
+VALVE_STATE_PATTERNS = (
+    'binary_sensor.{name}_valve_state',
+    'binary_sensor.{short_name}_valve_state',
+    'sensor.{name}_valve_state',
+)
+VALVE_POSITION_PATTERNS = (
+    'sensor.{name}_position',
+    'sensor.{short_name}_position',
+    'number.{name}_position',
+)
+
+# Valve sensor states, and presets tried in order to allow a manual temperature override
+VALVE_OPEN_STATES = frozenset(('open', 'opened', 'on', 'true'))
+VALVE_CLOSED_STATES = frozenset(('closed', 'off', 'false'))
+MANUAL_ON_PRESETS = ('none', 'manual', 'away')
+MANUAL_OFF_PRESETS = ('none', 'manual')
+
+# Last value successfully applied to each boiler or statistics entity, as (desired, monotonic timestamp).
+# Boiler commands only rely on it when the boiler is missing from the state snapshot; a snapshot also catches manual changes.
+LAST_DESIRED = {}
+LAST_DESIRED_TTL = 1800  # Re-check against Home Assistant at least every 30 minutes
+
+# Valve state and position sensors resolved for each TRV, kept across polls and
+# re-probed every VALVE_ENTITIES_TTL seconds in case sensors were added or renamed
+VALVE_STATE_ENTITIES = {}
+VALVE_POSITION_ENTITIES = {}
+VALVE_ENTITIES_TTL = 3600
+valve_entities_resolved_at = time.monotonic()
+
+# Set by the state change subscription to wake the main loop for an immediate poll
+poll_requested = threading.Event()
+# Set when the add-on is asked to stop
+stop_requested = threading.Event()
+# Set while the state change subscription is confirmed and receiving events
+trv_changes_subscribed = threading.Event()
+EVENT_SETTLE_SECONDS = 5  # Let a burst of TRV changes settle before polling
+WEBSOCKET_RETRY_SECONDS = 30
+WEBSOCKET_PING_SECONDS = 60  # Ping an idle subscription this often; reconnect if the next ping interval passes without a reply
+# Idle polling backs off to at most IDLE_POLLING_BACKOFF times the configured interval, capped at 30 minutes
+IDLE_POLLING_BACKOFF = 4
+MAX_IDLE_POLLING_INTERVAL = 1800
 
 # Global MQTT client
 mqtt_client = None
 mqtt_connected = False
+mqtt_connected_event = threading.Event()  # Set alongside mqtt_connected so startup can wait for it
+MQTT_CONNECT_TIMEOUT = 5
+# Last state payload published for each sensor; states are retained, so unchanged values are not re-sent
+MQTT_PUBLISHED_STATES = {}
+
+
+def decode_json(content):
+    """Decode a JSON body, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def encode_json(data):
+    """Encode data as a JSON body (bytes), using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
 
 
 def load_config():
-    """Load configuration from options.json."""
+    """Load configuration from options.json, filling in defaults for missing options."""
     try:
-        with open('/data/options.json', 'r') as f:
-            return json.load(f)
+        with open('/data/options.json', 'rb') as f:
+            return {**DEFAULTS, **decode_json(f.read())}
     except Exception as e:
         logger.error(f"Failed to load configuration: {e}")
-        return {
-            'debug_logging': False,
-            'trv_entities': [],
-            'boiler_entity': '',
-            'boiler_mode': 'thermostat',
-            'manual_on_temperature': 21,
-            'manual_off_temperature': 14,
-            'check_valve_state': True,
-            'ignore_hvac_action': False,
-            'ignore_above_target': False,
-            'min_valve_position_threshold': 0,
-            'min_trvs_heating': 1,
-            'use_dynamic_temperature': True,
-            'polling_interval': 300
-        }
+        return dict(DEFAULTS)
 
 
 def get_entity_state(entity_id):
     """Get entity state and attributes from Home Assistant."""
-    headers = {
-        'Authorization': f'Bearer {SUPERVISOR_TOKEN}',
-        'Content-Type': 'application/json',
-    }
-    
     try:
-        url = f'{HA_API_URL}/states/{entity_id}'
-        response = requests.get(url, headers=headers, timeout=10)
+        url = STATES_URL + '/' + entity_id
+        response = SESSION.get(url, timeout=HTTP_TIMEOUT)
+        if response.status_code == 404:
+            logger.debug("Entity %s not found", entity_id)
+            return None
         response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return decode_json(response.content)
+    except (requests.exceptions.RequestException, ValueError) as e:
         logger.error(f"Failed to get state for {entity_id}: {e}")
         return None
 
 
+def fetch_all_states():
+    """Get every entity state from Home Assistant in one request, keyed by entity_id."""
+    try:
+        response = SESSION.get(STATES_URL, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        return {state['entity_id']: state for state in decode_json(response.content)}
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.warning(f"Failed to get all states, falling back to per-entity requests: {e}")
+        return None
+
+
+def fetch_states(entity_ids):
+    """Get the states of only the given entities in one request, keyed by entity_id.
+    
+    Home Assistant filters the entities server-side through the template API, so the response
+    does not grow with the size of the installation. Falls back to fetching all states.
+    """
+    try:
+        response = SESSION.post(
+            TEMPLATE_URL,
+            data=encode_json({'template': STATES_TEMPLATE, 'variables': {'entity_ids': list(entity_ids)}}),
+            timeout=HTTP_TIMEOUT
+        )
+        response.raise_for_status()
+        return {state['entity_id']: state for state in decode_json(response.content)}
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.warning(f"Failed to render entity states template, fetching all states: {e}")
+        return fetch_all_states()
+
+
+def get_poll_entity_ids(trv_entities, boiler_entity=None):
+    """Return every entity a poll may read: the TRVs, their valve state and position sensors, and the boiler."""
+    entity_ids = list(trv_entities)
+    if boiler_entity:
+        entity_ids.append(boiler_entity)
+    for trv_entity_id in trv_entities:
+        if '.' not in trv_entity_id:
+            continue
+        if trv_entity_id in VALVE_STATE_ENTITIES:
+            entity_ids.append(VALVE_STATE_ENTITIES[trv_entity_id])
+        else:
+            entity_ids.extend(get_valve_state_candidates(trv_entity_id))
+        if trv_entity_id in VALVE_POSITION_ENTITIES:
+            entity_ids.append(VALVE_POSITION_ENTITIES[trv_entity_id])
+        else:
+            entity_ids.extend(get_valve_position_candidates(trv_entity_id))
+    return entity_ids
+
+
+def fetch_entity_states(entity_ids):
+    """Fetch several entity states concurrently over the shared session, keyed by entity_id.
+    
+    Entities that do not exist are left out, matching the bulk state snapshots.
+    """
+    with ThreadPoolExecutor(max_workers=HTTP_FANOUT_WORKERS) as executor:
+        results = list(executor.map(get_entity_state, entity_ids))
+    return {entity_id: state for entity_id, state in zip(entity_ids, results) if state}
+
+
+def lookup_entity_state(states, entity_id):
+    """Look up an entity in a state snapshot, or fetch it directly if no snapshot is available."""
+    if states is None:
+        return get_entity_state(entity_id)
+    return states.get(entity_id)
+
+
 def call_service(domain, service, entity_id, service_data=None):
     """Call a Home Assistant service."""
-    headers = {
-        'Authorization': f'Bearer {SUPERVISOR_TOKEN}',
-        'Content-Type': 'application/json',
-    }
-    
     data = {'entity_id': entity_id}
     if service_data:
         data.update(service_data)
     
     try:
-        url = f'{HA_API_URL}/services/{domain}/{service}'
-        response = requests.post(url, headers=headers, json=data, timeout=10)
+        url = SERVICES_URL + domain + '/' + service
+        response = SESSION.post(url, data=encode_json(data), timeout=SERVICE_TIMEOUT)
         response.raise_for_status()
         logger.info(f"Successfully called {domain}.{service} on {entity_id}")
         return True
@@ -96,15 +279,20 @@ def on_mqtt_connect(client, userdata, flags, rc):
     if rc == 0:
         logger.info("Connected to MQTT broker")
         mqtt_connected = True
+        mqtt_connected_event.set()
+        # Re-send every state after (re)connecting in case the broker lost its retained messages
+        MQTT_PUBLISHED_STATES.clear()
     else:
         logger.error(f"Failed to connect to MQTT broker, return code {rc}")
         mqtt_connected = False
+        mqtt_connected_event.clear()
 
 
 def on_mqtt_disconnect(client, userdata, rc):
     """MQTT disconnection callback."""
     global mqtt_connected
     mqtt_connected = False
+    mqtt_connected_event.clear()
     if rc != 0:
         logger.warning(f"Unexpected MQTT disconnection (rc={rc}), will auto-reconnect")
 
@@ -117,6 +305,8 @@ def setup_mqtt(mqtt_host, mqtt_port, mqtt_user='', mqtt_password=''):
         mqtt_client = mqtt.Client(client_id="active_heating_manager")
         mqtt_client.on_connect = on_mqtt_connect
         mqtt_client.on_disconnect = on_mqtt_disconnect
+        # Back off from 1 s up to 2 minutes between automatic reconnect attempts
+        mqtt_client.reconnect_delay_set(min_delay=1, max_delay=120)
         
         if mqtt_user and mqtt_password:
             mqtt_client.username_pw_set(mqtt_user, mqtt_password)
@@ -125,9 +315,7 @@ def setup_mqtt(mqtt_host, mqtt_port, mqtt_user='', mqtt_password=''):
         mqtt_client.loop_start()
         
         # Wait briefly for connection
-        time.sleep(2)
-        
-        if mqtt_connected:
+        if mqtt_connected_event.wait(MQTT_CONNECT_TIMEOUT):
             logger.info("MQTT client setup complete")
             return True
         else:
@@ -174,9 +362,12 @@ def publish_mqtt_discovery(sensor_id, sensor_name, unit=None, device_class=None,
     # Publish discovery config
     topic = f'homeassistant/sensor/active_heating_manager/{sensor_id}/config'
     try:
-        result = mqtt_client.publish(topic, json.dumps(config), qos=1, retain=True)
-        result.wait_for_publish()
-        logger.debug(f"Published MQTT discovery for {sensor_id}")
+        # Queued for the network loop to deliver (and retry at QoS 1) rather than waiting for the broker
+        result = mqtt_client.publish(topic, encode_json(config), qos=1, retain=True)
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            logger.error(f"Failed to queue MQTT discovery for {sensor_id}: {mqtt.error_string(result.rc)}")
+            return False
+        logger.debug("Queued MQTT discovery for %s", sensor_id)
         return True
     except Exception as e:
         logger.error(f"Failed to publish MQTT discovery for {sensor_id}: {e}")
@@ -188,9 +379,15 @@ def publish_mqtt_state(sensor_id, state_value):
     if not mqtt_connected or not mqtt_client:
         return False
     
+    payload = str(state_value)
+    if MQTT_PUBLISHED_STATES.get(sensor_id) == payload:
+        return True
+    
     topic = f'homeassistant/sensor/active_heating_manager/{sensor_id}/state'
     try:
-        mqtt_client.publish(topic, str(state_value), qos=0, retain=True)
+        result = mqtt_client.publish(topic, payload, qos=0, retain=True)
+        if result.rc == mqtt.MQTT_ERR_SUCCESS:
+            MQTT_PUBLISHED_STATES[sensor_id] = payload
         return True
     except Exception as e:
         logger.error(f"Failed to publish state for {sensor_id}: {e}")
@@ -199,199 +396,323 @@ def publish_mqtt_state(sensor_id, state_value):
 
 def set_entity_state(entity_id, state, attributes=None):
     """Set entity state in Home Assistant (legacy REST API method)."""
-    headers = {
-        'Authorization': f'Bearer {SUPERVISOR_TOKEN}',
-        'Content-Type': 'application/json',
-    }
-    
     data = {
         'state': state,
         'attributes': attributes or {}
     }
     
     try:
-        url = f'{HA_API_URL}/states/{entity_id}'
-        response = requests.post(url, headers=headers, json=data, timeout=10)
+        url = STATES_URL + '/' + entity_id
+        response = SESSION.post(url, data=encode_json(data), timeout=HTTP_TIMEOUT)
         response.raise_for_status()
-        logger.debug(f"Successfully set state for {entity_id} to {state}")
+        logger.debug("Successfully set state for %s to %s", entity_id, state)
         return True
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to set state for {entity_id}: {e}")
         return False
 
 
-def set_manual_temperature_thermostat(entity_id, target_temperature):
-    """Set thermostat to manual mode with high temperature to trigger heating."""
-    # Round to nearest 0.5°C (whole or half degrees)
-    target_temperature = round(target_temperature * 2) / 2
+def is_already_applied(entity_id, desired):
+    """Return True if desired was recently applied to entity_id, so the read and write can be skipped."""
+    cached = LAST_DESIRED.get(entity_id)
+    return cached is not None and cached[0] == desired and time.monotonic() - cached[1] < LAST_DESIRED_TTL
+
+
+def record_applied(entity_id, desired, success):
+    """Remember the value applied to entity_id, or forget it if applying failed."""
+    if success:
+        LAST_DESIRED[entity_id] = (desired, time.monotonic())
+    else:
+        LAST_DESIRED.pop(entity_id, None)
+    return success
+
+
+def get_supported_presets(presets, preset_modes):
+    """Return the presets the thermostat reports supporting, or all of them if it doesn't report any."""
+    if not preset_modes:
+        return presets
+    return tuple(preset for preset in presets if preset in preset_modes) or presets
+
+
+def is_at_temperature(current_temp, target_temperature):
+    """Return True if a reported setpoint matches the target, allowing for float or string values."""
+    try:
+        return abs(float(current_temp) - target_temperature) < 0.25
+    except (ValueError, TypeError):
+        return False
+
+
+def set_manual_temperature_thermostat(entity_id, target_temperature, presets=MANUAL_ON_PRESETS, states=None):
+    """Set thermostat to manual mode with the given temperature.
+    
+    target_temperature is expected in whole or half degrees: the configured temperatures are
+    whole degrees and calculate_dynamic_temperature already rounds with round_to_nearest_half.
+    The first preset in presets that can be applied is used to allow the manual override;
+    pass MANUAL_OFF_PRESETS when setting the low temperature for no heating demand.
+    """
+    desired = ('temp', target_temperature)
+    if (states is None or entity_id not in states) and is_already_applied(entity_id, desired):
+        logger.info(f"Thermostat {entity_id} already set to {target_temperature}°C")
+        return True
     logger.info(f"Setting thermostat {entity_id} to manual mode with temperature {target_temperature}°C")
     
-    # First, set to manual/away/none preset to enable manual temperature control
-    state_data = get_entity_state(entity_id)
+    # First, set to a manual preset to enable manual temperature control
+    state_data = lookup_entity_state(states, entity_id)
     if state_data:
         attributes = state_data.get('attributes', {})
         current_preset = attributes.get('preset_mode', 'none')
         current_temp = attributes.get('temperature', 0)
         
         # If already at target temperature in a non-schedule mode, no action needed
-        if current_temp == target_temperature and current_preset != 'schedule':
+        if is_at_temperature(current_temp, target_temperature) and current_preset != 'schedule':
             logger.info(f"Already at target temperature {target_temperature}°C")
-            return True
+            return record_applied(entity_id, desired, True)
         
-        # Try to set preset to manual/none to allow temperature override
-        for preset in ['none', 'manual', 'away']:
-            if call_service('climate', 'set_preset_mode', entity_id, {'preset_mode': preset}):
-                logger.info(f"Set preset to '{preset}'")
-                break
+        # Try to set preset to manual/none to allow temperature override, unless already in the preferred one
+        supported_presets = get_supported_presets(presets, attributes.get('preset_modes'))
+        if current_preset != supported_presets[0]:
+            for preset in supported_presets:
+                if call_service('climate', 'set_preset_mode', entity_id, {'preset_mode': preset}):
+                    logger.info(f"Set preset to '{preset}'")
+                    break
     
     # Set the target temperature
-    return call_service('climate', 'set_temperature', entity_id, {'temperature': target_temperature})
+    return record_applied(entity_id, desired, call_service('climate', 'set_temperature', entity_id, {'temperature': target_temperature}))
 
 
-def set_manual_off_temperature_thermostat(entity_id, off_temperature):
-    """Set thermostat to manual mode with low temperature when no heating demand."""
-    # Round to nearest 0.5°C (whole or half degrees)
-    off_temperature = round(off_temperature * 2) / 2
-    logger.info(f"Setting thermostat {entity_id} to manual mode with off temperature {off_temperature}°C")
-    
-    # First, set to manual/none preset to enable manual temperature control
-    state_data = get_entity_state(entity_id)
-    if state_data:
-        attributes = state_data.get('attributes', {})
-        current_preset = attributes.get('preset_mode', 'none')
-        current_temp = attributes.get('temperature', 0)
-        
-        # If already at off temperature in a non-schedule mode, no action needed
-        if current_temp == off_temperature and current_preset != 'schedule':
-            logger.info(f"Already at off temperature {off_temperature}°C")
-            return True
-        
-        # Try to set preset to manual/none to allow temperature override
-        for preset in ['none', 'manual']:
-            if call_service('climate', 'set_preset_mode', entity_id, {'preset_mode': preset}):
-                logger.info(f"Set preset to '{preset}'")
-                break
-    
-    # Set the off temperature
-    return call_service('climate', 'set_temperature', entity_id, {'temperature': off_temperature})
+@lru_cache(maxsize=None)
+def get_toggle_domain(entity_id):
+    """Determine the service domain for a toggle entity, defaulting to switch."""
+    domain, separator, _ = entity_id.partition('.')
+    return domain if separator else 'switch'
 
 
-def turn_on_boiler_toggle(entity_id):
+def turn_on_boiler_toggle(entity_id, states=None):
     """Turn on the boiler toggle switch."""
+    desired = ('switch', 'on')
+    if (states is None or entity_id not in states) and is_already_applied(entity_id, desired):
+        logger.info(f"Toggle {entity_id} already on")
+        return True
     logger.info(f"Turning on boiler toggle {entity_id}")
     
     # Check current state first
-    state_data = get_entity_state(entity_id)
+    state_data = lookup_entity_state(states, entity_id)
     if state_data:
         current_state = state_data.get('state', 'unknown')
         if current_state == 'on':
             logger.info(f"Toggle already on, no action needed")
-            return True
+            return record_applied(entity_id, desired, True)
         else:
             logger.info(f"Toggle is {current_state}, turning on...")
     
-    # Determine domain from entity_id
-    domain = entity_id.split('.')[0] if '.' in entity_id else 'switch'
-    return call_service(domain, 'turn_on', entity_id)
+    domain = get_toggle_domain(entity_id)
+    return record_applied(entity_id, desired, call_service(domain, 'turn_on', entity_id))
 
 
-def turn_off_boiler_toggle(entity_id):
+def turn_off_boiler_toggle(entity_id, states=None):
     """Turn off the boiler toggle switch."""
+    desired = ('switch', 'off')
+    if (states is None or entity_id not in states) and is_already_applied(entity_id, desired):
+        logger.info(f"Toggle {entity_id} already off")
+        return True
     logger.info(f"Turning off boiler toggle {entity_id}")
     
     # Check current state first
-    state_data = get_entity_state(entity_id)
+    state_data = lookup_entity_state(states, entity_id)
     if state_data:
         current_state = state_data.get('state', 'unknown')
         if current_state == 'off':
             logger.info(f"Toggle already off, no action needed")
-            return True
+            return record_applied(entity_id, desired, True)
         else:
             logger.info(f"Toggle is {current_state}, turning off...")
     
-    # Determine domain from entity_id
-    domain = entity_id.split('.')[0] if '.' in entity_id else 'switch'
-    return call_service(domain, 'turn_off', entity_id)
+    domain = get_toggle_domain(entity_id)
+    return record_applied(entity_id, desired, call_service(domain, 'turn_off', entity_id))
+
+
+def format_candidates(trv_entity_id, patterns):
+    """Fill in sensor entity ID patterns for a TRV, skipping duplicates when the name has no _trv suffix."""
+    # Extract the name part
+    domain, _, name = trv_entity_id.partition('.')
+    short_name = name.replace('_trv', '')
+    return tuple(dict.fromkeys(pattern.format(name=name, short_name=short_name) for pattern in patterns))
+
+
+@lru_cache(maxsize=None)
+def get_valve_state_candidates(trv_entity_id):
+    """Return the common valve state entity IDs for a TRV (climate.xxx_trv -> binary_sensor.xxx_trv_valve_state)."""
+    return format_candidates(trv_entity_id, VALVE_STATE_PATTERNS)
+
+
+def expire_valve_entities():
+    """Forget the resolved valve sensors once they are older than VALVE_ENTITIES_TTL, so the next poll re-probes."""
+    global valve_entities_resolved_at
+    now = time.monotonic()
+    if now - valve_entities_resolved_at >= VALVE_ENTITIES_TTL:
+        logger.debug("Re-probing valve state and position sensors")
+        VALVE_STATE_ENTITIES.clear()
+        VALVE_POSITION_ENTITIES.clear()
+        valve_entities_resolved_at = now
+
+
+def build_valve_map(trv_entities, states, get_candidates=get_valve_state_candidates):
+    """Resolve the valve state sensor (or other candidates from get_candidates) for each TRV against a state snapshot.
+    
+    TRVs without a matching sensor are left out so they are probed again on later polls,
+    in case their sensors were not yet loaded when the snapshot was taken.
+    """
+    valve_map = {}
+    for trv_entity_id in trv_entities:
+        if '.' not in trv_entity_id:
+            continue
+        for valve_entity_id in get_candidates(trv_entity_id):
+            if valve_entity_id in states:
+                valve_map[trv_entity_id] = valve_entity_id
+                break
+    return valve_map
 
 
-def get_valve_state(trv_entity_id):
+def get_valve_state(trv_entity_id, states=None):
     """Check if the valve for a TRV is open. Returns True if open/unknown, False if closed."""
-    # Convert climate.xxx_trv to binary_sensor.xxx_trv_valve_state
     if '.' not in trv_entity_id:
         return True  # If invalid entity format, assume valve is open
     
-    # Extract the name part
-    domain, name = trv_entity_id.split('.', 1)
-    
-    # Try common valve state entity patterns
-    valve_entity_patterns = [
-        f'binary_sensor.{name}_valve_state',
-        f'binary_sensor.{name.replace("_trv", "")}_valve_state',
-        f'sensor.{name}_valve_state',
-    ]
+    # Use the sensor resolved previously, otherwise try common valve state entity patterns
+    if trv_entity_id in VALVE_STATE_ENTITIES:
+        valve_entity_patterns = (VALVE_STATE_ENTITIES[trv_entity_id],)
+    else:
+        valve_entity_patterns = get_valve_state_candidates(trv_entity_id)
     
     for valve_entity_id in valve_entity_patterns:
-        state_data = get_entity_state(valve_entity_id)
+        state_data = lookup_entity_state(states, valve_entity_id)
         if state_data:
+            VALVE_STATE_ENTITIES[trv_entity_id] = valve_entity_id
             state = state_data.get('state', 'unknown').lower()
-            logger.debug(f"Found valve sensor {valve_entity_id} with state: {state}")
+            logger.debug("Found valve sensor %s with state: %s", valve_entity_id, state)
             
             # Check for open states
-            if state in ['open', 'opened', 'on', 'true']:
+            if state in VALVE_OPEN_STATES:
                 return True
-            elif state in ['closed', 'off', 'false']:
+            elif state in VALVE_CLOSED_STATES:
                 return False
             else:
-                logger.debug(f"Unknown valve state '{state}', assuming open")
+                logger.debug("Unknown valve state '%s', assuming open", state)
                 return True
     
-    # No valve sensor found, assume valve is operational
-    logger.debug(f"No valve sensor found for {trv_entity_id}, assuming valve is open")
+    # No valve sensor found (forget any previously resolved one), assume valve is operational
+    VALVE_STATE_ENTITIES.pop(trv_entity_id, None)
+    logger.debug("No valve sensor found for %s, assuming valve is open", trv_entity_id)
     return True
 
 
+def watch_trv_changes(entity_ids, attribute=None):
+    """Subscribe to TRV state changes via the WebSocket API and request a poll on each change.
+    
+    Watches the given attribute of the entities, or only their state (not attribute updates)
+    if no attribute is given. Runs forever in a background thread, reconnecting after errors
+    or when pings go unanswered. Regular polling continues alongside as a safety net.
+    """
+    trigger = {'platform': 'state', 'entity_id': list(entity_ids)}
+    if attribute:
+        trigger['attribute'] = attribute
+    else:
+        trigger['to'] = None
+    
+    while True:
+        ws = None
+        try:
+            ws = websocket.create_connection(HA_WEBSOCKET_URL, timeout=10)
+            ws.recv()  # auth_required
+            ws.send(json.dumps({'type': 'auth', 'access_token': SUPERVISOR_TOKEN}))
+            auth_result = decode_json(ws.recv())
+            if auth_result.get('type') != 'auth_ok':
+                logger.error(f"WebSocket authentication failed: {auth_result.get('message', auth_result)}")
+                return
+            
+            ws.send(json.dumps({'id': 1, 'type': 'subscribe_trigger', 'trigger': trigger}))
+            ws.settimeout(WEBSOCKET_PING_SECONDS)
+            
+            # Ping when the connection goes quiet so a half-open connection is noticed and replaced
+            message_id = 1
+            ping_pending = False
+            while True:
+                try:
+                    message = decode_json(ws.recv())
+                except websocket.WebSocketTimeoutException:
+                    if ping_pending:
+                        raise ConnectionError("no reply to ping")
+                    message_id += 1
+                    ws.send(json.dumps({'id': message_id, 'type': 'ping'}))
+                    ping_pending = True
+                    continue
+                
+                ping_pending = False
+                if message.get('type') == 'event':
+                    logger.debug("TRV state change received, requesting poll")
+                    poll_requested.set()
+                elif message.get('type') == 'result':
+                    if not message.get('success'):
+                        logger.error(f"State change subscription rejected: {message.get('error')}")
+                        return
+                    logger.info(f"Subscribed to state changes for {len(entity_ids)} entities")
+                    trv_changes_subscribed.set()
+        except Exception as e:
+            logger.warning(f"State change subscription lost ({e}), retrying in {WEBSOCKET_RETRY_SECONDS} seconds")
+        finally:
+            trv_changes_subscribed.clear()
+            if ws:
+                ws.close()
+        time.sleep(WEBSOCKET_RETRY_SECONDS)
+
+
+def round_to_nearest_half(value):
+    """Round a temperature to the nearest 0.5°C (whole or half degrees)."""
+    return round(value * 2) / 2
+
+
 def round_up_to_nearest_25(value):
     """Round up a percentage value to the nearest 25% (0, 25, 50, 75, 100)."""
     if value <= 0:
         return 0
-    elif value <= 25:
-        return 25
-    elif value <= 50:
-        return 50
-    elif value <= 75:
-        return 75
-    else:
-        return 100
+    return min(100, math.ceil(value / 25) * 25)
 
 
-def get_valve_position(trv_entity_id):
+@lru_cache(maxsize=None)
+def get_valve_position_candidates(trv_entity_id):
+    """Return the common valve position entity IDs for a TRV (climate.xxx_trv -> sensor.xxx_trv_position)."""
+    return format_candidates(trv_entity_id, VALVE_POSITION_PATTERNS)
+
+
+def get_valve_position(trv_entity_id, states=None):
     """Get the valve position percentage for a TRV. Returns None if not available."""
     if '.' not in trv_entity_id:
         return None
     
-    # Extract the name part
-    domain, name = trv_entity_id.split('.', 1)
-    
-    # Try common valve position entity patterns
-    position_entity_patterns = [
-        f'sensor.{name}_position',
-        f'sensor.{name.replace("_trv", "")}_position',
-        f'number.{name}_position',
-    ]
+    # Use the sensor resolved previously, otherwise try common valve position entity patterns
+    if trv_entity_id in VALVE_POSITION_ENTITIES:
+        position_entity_patterns = (VALVE_POSITION_ENTITIES[trv_entity_id],)
+    else:
+        position_entity_patterns = get_valve_position_candidates(trv_entity_id)
     
+    sensor_found = False
     for position_entity_id in position_entity_patterns:
-        state_data = get_entity_state(position_entity_id)
+        state_data = lookup_entity_state(states, position_entity_id)
         if state_data:
+            sensor_found = True
             state = state_data.get('state', 'unknown')
             try:
                 position = float(state)
-                logger.debug(f"Found valve position sensor {position_entity_id} with position: {position}%")
+                logger.debug("Found valve position sensor %s with position: %s%%", position_entity_id, position)
+                VALVE_POSITION_ENTITIES[trv_entity_id] = position_entity_id
                 return position
             except (ValueError, TypeError):
-                logger.debug(f"Invalid position value '{state}' for {position_entity_id}")
+                logger.debug("Invalid position value '%s' for %s", state, position_entity_id)
                 continue
     
-    logger.debug(f"No valve position sensor found for {trv_entity_id}")
+    if not sensor_found:
+        VALVE_POSITION_ENTITIES.pop(trv_entity_id, None)
+    logger.debug("No valve position sensor found for %s", trv_entity_id)
     return None
 
 
@@ -417,7 +738,7 @@ def publish_heating_stats(heating_active, trv_count_heating, avg_valve_position,
         # Fallback to REST API (entities won't have unique IDs)
         logger.warning("MQTT not connected - entities will not have unique IDs for UI configuration")
         
-        set_entity_state(
+        updates = [(
             'sensor.active_heating_manager_status',
             'heating' if heating_active else 'idle',
             {
@@ -426,9 +747,7 @@ def publish_heating_stats(heating_active, trv_count_heating, avg_valve_position,
                 'trvs_heating': trv_count_heating,
                 'mode': boiler_mode
             }
-        )
-        
-        set_entity_state(
+        ), (
             'sensor.active_heating_manager_trvs_heating',
             str(trv_count_heating),
             {
@@ -436,10 +755,10 @@ def publish_heating_stats(heating_active, trv_count_heating, avg_valve_position,
                 'icon': 'mdi:counter',
                 'unit_of_measurement': 'TRVs'
             }
-        )
+        )]
         
         if avg_valve_position is not None:
-            set_entity_state(
+            updates.append((
                 'sensor.active_heating_manager_avg_valve_position',
                 str(round(avg_valve_position, 1)),
                 {
@@ -447,10 +766,10 @@ def publish_heating_stats(heating_active, trv_count_heating, avg_valve_position,
                     'icon': 'mdi:valve',
                     'unit_of_measurement': '%'
                 }
-            )
+            ))
         
         if boiler_mode == 'thermostat' and target_temp is not None:
-            set_entity_state(
+            updates.append((
                 'sensor.active_heating_manager_target_temp',
                 str(target_temp),
                 {
@@ -459,86 +778,117 @@ def publish_heating_stats(heating_active, trv_count_heating, avg_valve_position,
                     'unit_of_measurement': '°C',
                     'device_class': 'temperature'
                 }
-            )
+            ))
+        
+        # Only write sensors whose state or attributes changed since they were last written
+        updates = [update for update in updates if not is_already_applied(update[0], update[1:])]
+        if not updates:
+            logger.debug("Heating statistics unchanged, skipping state writes")
+            return
+        
+        with ThreadPoolExecutor(max_workers=HTTP_FANOUT_WORKERS) as executor:
+            results = list(executor.map(lambda update: set_entity_state(*update), updates))
+        for update, success in zip(updates, results):
+            record_applied(update[0], update[1:], success)
+
 
+def get_boiler_current_temperature(boiler_entity, fallback_temp, states=None):
+    """Get the boiler thermostat's current temperature, or fallback_temp if it is unavailable."""
+    state_data = lookup_entity_state(states, boiler_entity)
+    if not state_data:
+        logger.debug("Could not get boiler state, using fallback temperature: %s°C", fallback_temp)
+        return fallback_temp
+    
+    current_temp = state_data.get('attributes', {}).get('current_temperature')
+    logger.debug("Boiler thermostat current_temperature attribute: %s", current_temp)
+    if current_temp is not None:
+        try:
+            current_boiler_temp = float(current_temp)
+            logger.debug("Using boiler current temperature: %s°C", current_boiler_temp)
+            return current_boiler_temp
+        except (ValueError, TypeError):
+            logger.warning(f"Invalid current temperature value: {current_temp}, using fallback: {fallback_temp}°C")
+    return fallback_temp
 
-def calculate_dynamic_temperature(avg_valve_position, boiler_entity, manual_on_temp, manual_off_temp):
+
+def calculate_dynamic_temperature(avg_valve_position, current_boiler_temp, manual_on_temp, manual_off_temp):
     """Calculate target temperature based on average valve position.
     
     Args:
         avg_valve_position: Average valve position percentage (0-100)
-        boiler_entity: Boiler thermostat entity ID
+        current_boiler_temp: Current temperature reported by the boiler thermostat
         manual_on_temp: Maximum temperature to set
         manual_off_temp: Minimum temperature to set
     
     Returns:
         Target temperature in degrees Celsius
     """
-    logger.debug(f"=== Dynamic Temperature Calculation ===")
-    logger.debug(f"Input: avg_valve_position={avg_valve_position}%, manual_off={manual_off_temp}°C, manual_on={manual_on_temp}°C")
+    logger.debug("=== Dynamic Temperature Calculation ===")
+    logger.debug("Input: avg_valve_position=%s%%, current_boiler=%s°C, manual_off=%s°C, manual_on=%s°C", avg_valve_position, current_boiler_temp, manual_off_temp, manual_on_temp)
     
     if avg_valve_position <= 0:
-        logger.debug(f"Valve position is 0%, returning manual_off_temp: {manual_off_temp}°C")
+        logger.debug("Valve position is 0%%, returning manual_off_temp: %s°C", manual_off_temp)
         return manual_off_temp
     
-    # Get current boiler temperature
-    state_data = get_entity_state(boiler_entity)
-    current_boiler_temp = manual_off_temp
-    if state_data:
-        attributes = state_data.get('attributes', {})
-        current_temp = attributes.get('current_temperature')
-        logger.debug(f"Boiler thermostat current_temperature attribute: {current_temp}")
-        if current_temp is not None:
-            try:
-                current_boiler_temp = float(current_temp)
-                logger.debug(f"Using boiler current temperature: {current_boiler_temp}°C")
-            except (ValueError, TypeError):
-                logger.warning(f"Invalid current temperature value: {current_temp}, using fallback: {manual_off_temp}°C")
-    else:
-        logger.debug(f"Could not get boiler state, using fallback temperature: {manual_off_temp}°C")
-    
     # At 25%, set to current temp + 0.5°C
     # Between 25% and 100%, scale linearly to manual_on_temp
     if avg_valve_position <= 25:
         # Scale from current_temp at 0% to current_temp + 0.5 at 25%
         target_at_0 = current_boiler_temp
         target_at_25 = current_boiler_temp + 0.5
-        logger.debug(f"Valve position <= 25%: scaling from {target_at_0}°C (0%) to {target_at_25}°C (25%)")
+        logger.debug("Valve position <= 25%%: scaling from %s°C (0%%) to %s°C (25%%)", target_at_0, target_at_25)
         # Linear interpolation between 0% and 25%
         target_temp = target_at_0 + (target_at_25 - target_at_0) * (avg_valve_position / 25)
-        logger.debug(f"Interpolation: {target_at_0} + ({target_at_25} - {target_at_0}) * ({avg_valve_position} / 25) = {target_temp}°C")
+        logger.debug("Interpolation: %s + (%s - %s) * (%s / 25) = %s°C", target_at_0, target_at_25, target_at_0, avg_valve_position, target_temp)
     else:
         # Scale from current_temp + 0.5 at 25% to manual_on_temp at 100%
         target_at_25 = current_boiler_temp + 0.5
-        logger.debug(f"Valve position > 25%: scaling from {target_at_25}°C (25%) to {manual_on_temp}°C (100%)")
+        logger.debug("Valve position > 25%%: scaling from %s°C (25%%) to %s°C (100%%)", target_at_25, manual_on_temp)
         # Linear interpolation between 25% and 100%
         target_temp = target_at_25 + (manual_on_temp - target_at_25) * ((avg_valve_position - 25) / 75)
-        logger.debug(f"Interpolation: {target_at_25} + ({manual_on_temp} - {target_at_25}) * (({avg_valve_position} - 25) / 75) = {target_temp}°C")
+        logger.debug("Interpolation: %s + (%s - %s) * ((%s - 25) / 75) = %s°C", target_at_25, manual_on_temp, target_at_25, avg_valve_position, target_temp)
     
     # Ensure we stay within bounds
     before_bounds = target_temp
     target_temp = max(manual_off_temp, min(manual_on_temp, target_temp))
     if before_bounds != target_temp:
-        logger.debug(f"Applied bounds: {before_bounds}°C → {target_temp}°C")
+        logger.debug("Applied bounds: %s°C → %s°C", before_bounds, target_temp)
     
-    # Round to nearest 0.5°C (whole or half degrees)
     before_rounding = target_temp
-    target_temp = round(target_temp * 2) / 2
-    logger.debug(f"Rounded to nearest 0.5°C: {before_rounding}°C → {target_temp}°C")
-    logger.debug(f"=== Final target temperature: {target_temp}°C ===")
+    target_temp = round_to_nearest_half(target_temp)
+    logger.debug("Rounded to nearest 0.5°C: %s°C → %s°C", before_rounding, target_temp)
+    logger.debug("=== Final target temperature: %s°C ===", target_temp)
     
     return target_temp
 
 
 def poll_trv_entities(trv_entities, boiler_entity=None, boiler_mode='thermostat', manual_on_temperature=21, manual_off_temperature=14, check_valve_state=True, ignore_hvac_action=False, ignore_above_target=False, min_valve_position_threshold=0, min_trvs_heating=1, use_dynamic_temperature=True):
-    """Poll all configured TRV entities and manage boiler based on heating demand."""
+    """Poll all configured TRV entities and manage boiler based on heating demand.
+    
+    Returns (any_trv_heating, avg_valve_position, trv_count_reporting_heating) so the caller can tell
+    whether demand changed, and whether TRVs that are not counted as heating could start to without a
+    change being pushed over the state change subscription.
+    """
     logger.info(f"Polling {len(trv_entities)} TRV entities...")
+    expire_valve_entities()
     
-    any_trv_heating = False
-    valve_positions = []  # Store positions of valves that are heating
+    # Fetch the relevant states once per poll, falling back to concurrent per-entity requests
+    poll_entity_ids = get_poll_entity_ids(trv_entities, boiler_entity)
+    states = fetch_states(poll_entity_ids)
+    if states is None:
+        states = fetch_entity_states(poll_entity_ids)
+    
+    trv_count_heating = 0
+    # TRVs whose demand can change through entities the state change subscription doesn't watch:
+    # any TRV whose hvac_action is heating (valve state, position and temperature filters), and in
+    # position mode any TRV ignored for being above target
+    trv_count_reporting_heating = 0
+    # Running total of the valve positions of heating TRVs, for the average
+    valve_position_total = 0
+    valve_position_count = 0
     
     for entity_id in trv_entities:
-        state_data = get_entity_state(entity_id)
+        state_data = states.get(entity_id)
         
         if state_data:
             state = state_data.get('state', 'unknown')
@@ -546,13 +896,16 @@ def poll_trv_entities(trv_entities, boiler_entity=None, boiler_mode='thermostat'
             
             logger.info(f"TRV {entity_id}:")
             logger.info(f"  State: {state}")
-            logger.debug(f"  Attributes: {json.dumps(attributes, indent=2)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("  Attributes: %s", json.dumps(attributes, indent=2))
             
             # Log key attributes if available
             if 'current_temperature' in attributes:
                 logger.info(f"  Current temp: {attributes['current_temperature']}")
             if 'temperature' in attributes:
                 logger.info(f"  Target temp: {attributes['temperature']}")
+            if not ignore_hvac_action and attributes.get('hvac_action') == 'heating':
+                trv_count_reporting_heating += 1
             # Check if current temperature is above target (buggy thermostat filter)
             if ignore_above_target:
                 current_temp = attributes.get('current_temperature')
@@ -561,9 +914,11 @@ def poll_trv_entities(trv_entities, boiler_entity=None, boiler_mode='thermostat'
                     try:
                         if float(current_temp) > float(target_temp):
                             logger.info(f"  Current temp ({current_temp}°C) > target temp ({target_temp}°C), ignoring TRV (Above target)")
+                            if ignore_hvac_action:
+                                trv_count_reporting_heating += 1
                             continue
                     except (ValueError, TypeError):
-                        logger.debug(f"  Could not compare temperatures: current={current_temp}, target={target_temp}")
+                        logger.debug("  Could not compare temperatures: current=%s, target=%s", current_temp, target_temp)
             
             # Determine if TRV is demanding heat
             is_heating = False
@@ -571,8 +926,8 @@ def poll_trv_entities(trv_entities, boiler_entity=None, boiler_mode='thermostat'
             
             if ignore_hvac_action:
                 # Ignore HVAC action, rely purely on valve position
-                logger.debug(f"  Ignoring HVAC action, checking valve position only")
-                current_position = get_valve_position(entity_id)
+                logger.debug("  Ignoring HVAC action, checking valve position only")
+                current_position = get_valve_position(entity_id, states)
                 if current_position is not None and current_position > min_valve_position_threshold:
                     is_heating = True
                     logger.info(f"  Valve position: {current_position}% (threshold: {min_valve_position_threshold}%) -> TRV is demanding heat")
@@ -589,13 +944,13 @@ def poll_trv_entities(trv_entities, boiler_entity=None, boiler_mode='thermostat'
                         # Check valve state if enabled
                         valve_open = True
                         if check_valve_state:
-                            valve_open = get_valve_state(entity_id)
+                            valve_open = get_valve_state(entity_id, states)
                             logger.info(f"  Valve state: {'open' if valve_open else 'closed'}")
                         
                         if valve_open:
                             # Check valve position threshold if configured
                             if min_valve_position_threshold > 0:
-                                current_position = get_valve_position(entity_id)
+                                current_position = get_valve_position(entity_id, states)
                                 if current_position is not None:
                                     if current_position > min_valve_position_threshold:
                                         is_heating = True
@@ -614,29 +969,27 @@ def poll_trv_entities(trv_entities, boiler_entity=None, boiler_mode='thermostat'
             
             # If TRV is demanding heat, track it and get valve position
             if is_heating:
-                any_trv_heating = True
+                trv_count_heating += 1
                 
                 # Get valve position for dynamic temperature calculation (if not already retrieved)
                 if use_dynamic_temperature:
                     if current_position is None:
-                        current_position = get_valve_position(entity_id)
+                        current_position = get_valve_position(entity_id, states)
                     if current_position is not None:
-                        valve_positions.append(current_position)
+                        valve_position_total += current_position
+                        valve_position_count += 1
                         logger.info(f"  Valve position: {current_position}%")
         else:
             logger.warning(f"Could not retrieve state for {entity_id}")
     
+    any_trv_heating = trv_count_heating > 0
+    
     # Calculate average valve position
     avg_valve_position = None
-    trv_count_heating = sum(1 for _ in range(len([e for e in trv_entities if any_trv_heating])))
-    if valve_positions:
-        raw_avg = sum(valve_positions) / len(valve_positions)
+    if valve_position_count:
+        raw_avg = valve_position_total / valve_position_count
         avg_valve_position = round_up_to_nearest_25(raw_avg)
-        logger.info(f"Average valve position across {len(valve_positions)} heating TRVs: {raw_avg:.1f}% (rounded up to {avg_valve_position}%)")
-        trv_count_heating = len(valve_positions)  # More accurate count
-    elif any_trv_heating:
-        # Count TRVs that are heating even if no position sensors
-        trv_count_heating = len([e for e in trv_entities if any_trv_heating])  # This is a simplified count
+        logger.info(f"Average valve position across {valve_position_count} heating TRVs: {raw_avg:.1f}% (rounded up to {avg_valve_position}%)")
     
     # Apply demand aggregation threshold
     sufficient_demand = False
@@ -654,37 +1007,43 @@ def poll_trv_entities(trv_entities, boiler_entity=None, boiler_mode='thermostat'
         if sufficient_demand:
             if boiler_mode == 'thermostat':
                 # Calculate target temperature based on valve positions if dynamic mode enabled
-                if use_dynamic_temperature and valve_positions:
+                if use_dynamic_temperature and valve_position_count:
                     target_temp = calculate_dynamic_temperature(
                         avg_valve_position, 
-                        boiler_entity, 
+                        get_boiler_current_temperature(boiler_entity, manual_off_temperature, states), 
                         manual_on_temperature, 
                         manual_off_temperature
                     )
                     logger.info(f"At least one TRV is heating - setting dynamic temperature to {target_temp}°C (based on {avg_valve_position:.1f}% avg valve position)")
-                    set_manual_temperature_thermostat(boiler_entity, target_temp)
+                    set_manual_temperature_thermostat(boiler_entity, target_temp, states=states)
                 else:
                     target_temp = manual_on_temperature
                     logger.info(f"At least one TRV is heating - setting manual temperature to {manual_on_temperature}°C")
-                    set_manual_temperature_thermostat(boiler_entity, manual_on_temperature)
+                    set_manual_temperature_thermostat(boiler_entity, manual_on_temperature, states=states)
             else:  # toggle mode
                 logger.info("At least one TRV is heating - turning on boiler toggle")
-                turn_on_boiler_toggle(boiler_entity)
+                turn_on_boiler_toggle(boiler_entity, states)
         else:
             if boiler_mode == 'thermostat':
                 target_temp = manual_off_temperature
                 logger.info(f"No TRVs currently heating - setting manual temperature to {manual_off_temperature}°C")
-                set_manual_off_temperature_thermostat(boiler_entity, manual_off_temperature)
+                set_manual_temperature_thermostat(boiler_entity, manual_off_temperature, MANUAL_OFF_PRESETS, states)
             else:  # toggle mode
                 logger.info("No TRVs currently heating - turning off boiler toggle")
-                turn_off_boiler_toggle(boiler_entity)
+                turn_off_boiler_toggle(boiler_entity, states)
     elif any_trv_heating:
         logger.warning("TRVs are heating but no boiler entity configured")
     
     # Publish statistics to Home Assistant
     publish_heating_stats(any_trv_heating, trv_count_heating, avg_valve_position, target_temp, boiler_mode)
     
-    return any_trv_heating
+    return any_trv_heating, avg_valve_position, trv_count_reporting_heating
+
+
+def handle_stop_signal(signum, frame):
+    """Signal handler that wakes the main loop and asks it to exit."""
+    stop_requested.set()
+    poll_requested.set()
 
 
 def main():
@@ -695,26 +1054,26 @@ def main():
     config = load_config()
     
     # Update logging level if debug enabled
-    if config.get('debug_logging', False):
+    if config['debug_logging']:
         logging.getLogger().setLevel(logging.DEBUG)
         logger.debug("Debug logging enabled")
     
-    trv_entities = config.get('trv_entities', [])
-    boiler_entity = config.get('boiler_entity', config.get('boiler_thermostat_entity', ''))  # Backwards compatibility
-    boiler_mode = config.get('boiler_mode', 'thermostat')
-    manual_on_temperature = config.get('manual_on_temperature', 21)
-    manual_off_temperature = config.get('manual_off_temperature', 14)
-    check_valve_state = config.get('check_valve_state', True)
-    ignore_hvac_action = config.get('ignore_hvac_action', False)
-    ignore_above_target = config.get('ignore_above_target', False)
-    min_valve_position_threshold = config.get('min_valve_position_threshold', 0)
-    min_trvs_heating = config.get('min_trvs_heating', 1)
-    use_dynamic_temperature = config.get('use_dynamic_temperature', True)
-    polling_interval = config.get('polling_interval', 300)
-    mqtt_host = config.get('mqtt_host', 'core-mosquitto')
-    mqtt_port = config.get('mqtt_port', 1883)
-    mqtt_user = config.get('mqtt_user', '')
-    mqtt_password = config.get('mqtt_password', '')
+    trv_entities = config['trv_entities']
+    boiler_entity = config['boiler_entity'] or config.get('boiler_thermostat_entity', '')  # Backwards compatibility
+    boiler_mode = config['boiler_mode']
+    manual_on_temperature = config['manual_on_temperature']
+    manual_off_temperature = config['manual_off_temperature']
+    check_valve_state = config['check_valve_state']
+    ignore_hvac_action = config['ignore_hvac_action']
+    ignore_above_target = config['ignore_above_target']
+    min_valve_position_threshold = config['min_valve_position_threshold']
+    min_trvs_heating = config['min_trvs_heating']
+    use_dynamic_temperature = config['use_dynamic_temperature']
+    polling_interval = config['polling_interval']
+    mqtt_host = config['mqtt_host']
+    mqtt_port = config['mqtt_port']
+    mqtt_user = config['mqtt_user']
+    mqtt_password = config['mqtt_password']
     
     logger.info(f"Configured with {len(trv_entities)} TRV entities")
     logger.info(f"Boiler entity: {boiler_entity or 'Not configured'}")
@@ -737,6 +1096,24 @@ def main():
     if not boiler_entity:
         logger.warning("No boiler entity configured - boiler control disabled")
     
+    # Derive the candidate valve sensor IDs for each TRV once, up front
+    for trv_entity_id in trv_entities:
+        if '.' in trv_entity_id:
+            get_valve_state_candidates(trv_entity_id)
+            get_valve_position_candidates(trv_entity_id)
+    
+    # Resolve valve sensors once rather than probing candidate entity IDs every poll; in position
+    # mode the position sensors are also what the state change subscription watches
+    if (check_valve_state or ignore_hvac_action) and trv_entities:
+        states = fetch_states(get_poll_entity_ids(trv_entities))
+        if states is not None:
+            if check_valve_state:
+                VALVE_STATE_ENTITIES.update(build_valve_map(trv_entities, states))
+                logger.info(f"Resolved valve state sensors for {len(VALVE_STATE_ENTITIES)} of {len(trv_entities)} TRVs")
+            if ignore_hvac_action:
+                VALVE_POSITION_ENTITIES.update(build_valve_map(trv_entities, states, get_valve_position_candidates))
+                logger.info(f"Resolved valve position sensors for {len(VALVE_POSITION_ENTITIES)} of {len(trv_entities)} TRVs")
+    
     # Setup MQTT for proper entity registration
     mqtt_setup = setup_mqtt(mqtt_host, mqtt_port, mqtt_user, mqtt_password)
     if mqtt_setup:
@@ -751,25 +1128,65 @@ def main():
     else:
         logger.warning("MQTT not available - entities will not have unique IDs for UI configuration")
     
+    # React to TRV changes as they happen rather than only on the polling interval. In position mode
+    # watch the position sensors' states, not the TRVs, whose attributes update far more often than demand
+    if ignore_hvac_action:
+        watched_entities, watched_attribute = list(VALVE_POSITION_ENTITIES.values()), None
+    else:
+        watched_entities, watched_attribute = trv_entities, 'hvac_action'
+    if WEBSOCKET_AVAILABLE and watched_entities:
+        watcher = threading.Thread(
+            target=watch_trv_changes,
+            args=(watched_entities, watched_attribute),
+            daemon=True
+        )
+        watcher.start()
+    else:
+        logger.info("State change subscription unavailable - relying on polling only")
+    
+    # The Supervisor stops add-ons with SIGTERM; exit promptly instead of finishing the sleep
+    signal.signal(signal.SIGTERM, handle_stop_signal)
+    
     try:
         # Main loop
-        while True:
-            poll_trv_entities(trv_entities, boiler_entity, boiler_mode, manual_on_temperature, manual_off_temperature, check_valve_state, ignore_hvac_action, ignore_above_target, min_valve_position_threshold, min_trvs_heating, use_dynamic_temperature)
-            logger.debug(f"Sleeping for {polling_interval} seconds...")
-            time.sleep(polling_interval)
+        last_demand = None
+        interval = polling_interval
+        max_idle_interval = max(polling_interval, min(polling_interval * IDLE_POLLING_BACKOFF, MAX_IDLE_POLLING_INTERVAL))
+        while not stop_requested.is_set():
+            poll_started = time.monotonic()
+            demand = poll_trv_entities(trv_entities, boiler_entity, boiler_mode, manual_on_temperature, manual_off_temperature, check_valve_state, ignore_hvac_action, ignore_above_target, min_valve_position_threshold, min_trvs_heating, use_dynamic_temperature)
+            
+            # While TRV changes are pushed over the WebSocket, back off while nothing is heating and
+            # demand is unchanged. Keep polling while any TRV reports heating: its valve sensors and
+            # temperatures are not pushed, so demand filtered out by them could appear unannounced
+            any_trv_heating, _, trv_count_reporting_heating = demand
+            if demand == last_demand and not any_trv_heating and not trv_count_reporting_heating and trv_changes_subscribed.is_set():
+                interval = min(interval * 2, max_idle_interval)
+            else:
+                interval = polling_interval
+            last_demand = demand
+            
+            # Count the interval from the start of the poll so slow polls don't stretch it
+            sleep_seconds = max(0, poll_started + interval - time.monotonic())
+            logger.debug("Sleeping for up to %.1f seconds...", sleep_seconds)
+            if poll_requested.wait(sleep_seconds) and not stop_requested.wait(EVENT_SETTLE_SECONDS):
+                logger.info("TRV state changed - polling early")
+            poll_requested.clear()
             
     except KeyboardInterrupt:
-        logger.info("Shutting down Active Heating Manager...")
-        if mqtt_client:
-            mqtt_client.loop_stop()
-            mqtt_client.disconnect()
-        sys.exit(0)
+        pass
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
         if mqtt_client:
             mqtt_client.loop_stop()
             mqtt_client.disconnect()
         sys.exit(1)
+    
+    logger.info("Shutting down Active Heating Manager...")
+    if mqtt_client:
+        mqtt_client.loop_stop()
+        mqtt_client.disconnect()
+    sys.exit(0)
 
 
 if __name__ == "__main__":
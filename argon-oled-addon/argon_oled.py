@@ -6,6 +6,7 @@ Displays system information on the Argon ONE OLED screen
 
 import time
 import os
+import signal
 import sys
 import threading
 from datetime import datetime
@@ -42,8 +43,12 @@ I2C_ADDRESS = 0x3C
 SCREEN_WIDTH = 128
 SCREEN_HEIGHT = 64
 SWITCH_DURATION = 30  # seconds between screens
+REFRESH_INTERVAL = 1  # seconds between display refreshes
 PIN_BUTTON = 4  # BCM Pin 4 for button
 
+# Set when the service is asked to stop
+stop_requested = threading.Event()
+
 # Home Assistant API
 SUPERVISOR_TOKEN = os.environ.get('SUPERVISOR_TOKEN', '')
 HA_API_URL = 'http://supervisor/core/api'
@@ -55,6 +60,8 @@ class ArgonOLED:
     def __init__(self, screen_list, switch_duration=30, temp_unit='C', debug_logging=False, show_credits=True, version="1.0.0"):
         """Initialize the OLED display"""
         try:
+            # Let luma open the bus itself: its managed smbus2 mode sends each frame in one
+            # i2c_rdwr transfer, whereas an external bus= falls back to 32-byte block writes
             self.serial = i2c(port=I2C_BUS, address=I2C_ADDRESS)
             self.device = ssd1306(self.serial, width=SCREEN_WIDTH, height=SCREEN_HEIGHT)
             self.device.clear()
@@ -169,10 +176,10 @@ class ArgonOLED:
                     # Resize to fit screen (max 128x64)
                     img.thumbnail((SCREEN_WIDTH, SCREEN_HEIGHT), Image.Resampling.LANCZOS)
                     logo_image = img
-                    self.debug_log(f"Loaded logo image from: {logo_path}")
+                    self.debug_log("Loaded logo image from: %s", logo_path)
                     break
             except Exception as e:
-                self.debug_log(f"Could not load logo from {logo_path}: {e}")
+                self.debug_log("Could not load logo from %s: %s", logo_path, e)
         
         if not logo_image:
             self.debug_log("No logo image could be loaded")
@@ -186,10 +193,12 @@ class ArgonOLED:
             logo_image=logo_image
         )
     
-    def debug_log(self, message):
-        """Print debug message if debug logging is enabled"""
+    def debug_log(self, message, *args):
+        """Print debug message if debug logging is enabled
+        Formatting of %-style args is deferred until the message is printed
+        """
         if self.debug_logging:
-            print(message)
+            print(message % args if args else message)
             sys.stdout.flush()
     
     def _draw_confirmation_countdown(self, action_name):
@@ -199,7 +208,7 @@ class ArgonOLED:
         cancelled = False
         button_was_released = False
         
-        self.debug_log(f"Starting {action_name} confirmation countdown...")
+        self.debug_log("Starting %s confirmation countdown...", action_name)
         
         for countdown in range(5, 0, -1):
             # Draw countdown with progress bar
@@ -222,7 +231,7 @@ class ArgonOLED:
                         
                         # Debug first few iterations
                         if countdown == 5 and i < 3:
-                            self.debug_log(f"Button state: {button_state}, released: {button_was_released}")
+                            self.debug_log("Button state: %s, released: %s", button_state, button_was_released)
                         
                         # Track when button is released (Value.ACTIVE = released)
                         if button_state == Value.ACTIVE:
@@ -231,7 +240,7 @@ class ArgonOLED:
                             button_was_released = True
                         # Detect new press after release (Value.INACTIVE = pressed)
                         elif button_state == Value.INACTIVE and button_was_released:
-                            self.debug_log(f"{action_name} cancelled by button press")
+                            self.debug_log("%s cancelled by button press", action_name)
                             cancelled = True
                             self.button_in_power_hold = False  # Resume screen rotation
                             with canvas(self.device) as draw:
@@ -240,7 +249,7 @@ class ArgonOLED:
                             time.sleep(2)
                             break
                 except Exception as e:
-                    self.debug_log(f"Button check error: {e}")
+                    self.debug_log("Button check error: %s", e)
                 time.sleep(0.1)
             
             if cancelled:
@@ -250,7 +259,7 @@ class ArgonOLED:
     
     def _execute_power_command(self, command, display_name):
         """Execute a power command (reboot or shutdown) via Supervisor API"""
-        self.debug_log(f"{display_name.upper()}: Executing {command} command")
+        self.debug_log("%s: Executing %s command", display_name.upper(), command)
         
         # Display executing message
         with canvas(self.device) as draw:
@@ -263,11 +272,11 @@ class ArgonOLED:
         response = self.supervisor_api.request(f'host/{command}', method='POST', timeout=10)
         
         if response:
-            self.debug_log(f"{display_name} response status: {response.status_code}")
-            self.debug_log(f"{display_name} response body: {response.text}")
+            self.debug_log("%s response status: %s", display_name, response.status_code)
+            self.debug_log("%s response body: %s", display_name, response.text)
             
             if response.status_code not in [200, 202]:
-                self.debug_log(f"WARNING: Unexpected status code: {response.status_code}")
+                self.debug_log("WARNING: Unexpected status code: %s", response.status_code)
         
         # Clear screen immediately after command
         self.device.clear()
@@ -426,7 +435,7 @@ class ArgonOLED:
                         continue
                     
                 except Exception as read_error:
-                    self.debug_log(f"Error reading GPIO: {read_error}")
+                    self.debug_log("Error reading GPIO: %s", read_error)
                     time.sleep(1)
                     continue
                 
@@ -459,7 +468,7 @@ class ArgonOLED:
                     press_count = 0
                 
         except Exception as e:
-            self.debug_log(f"Button monitor error: {e}")
+            self.debug_log("Button monitor error: %s", e)
     
     def cleanup(self):
         """Clean up and clear display"""
@@ -471,30 +480,31 @@ class ArgonOLED:
     
     def run(self):
         """Main loop"""
-        self.debug_log(f"Starting Argon OLED Display")
-        self.debug_log(f"Screen rotation: {' -> '.join(self.screen_list)}")
-        self.debug_log(f"Switch duration: {self.switch_duration}s")
-        self.debug_log(f"Temperature unit: {self.temp_unit}")
+        self.debug_log("Starting Argon OLED Display")
+        self.debug_log("Screen rotation: %s", ' -> '.join(self.screen_list))
+        self.debug_log("Switch duration: %ss", self.switch_duration)
+        self.debug_log("Temperature unit: %s", self.temp_unit)
         
-        # Show credits splash screen if enabled
-        if self.show_credits and not self.credits_shown:
-            self.debug_log("Displaying credits splash screen")
-            self.renderer.draw_credits(version=self.version)
-            self.credits_shown = True
-            time.sleep(5)  # Show for 5 seconds
-        
-        # Start button monitoring thread if GPIO is available
-        if GPIO_AVAILABLE:
-            button_thread = threading.Thread(target=self.button_monitor, daemon=True)
-            button_thread.start()
-            self.debug_log("Button monitoring thread started")
-        
-        loop_count = 0
         try:
-            while True:
+            # Show credits splash screen if enabled
+            if self.show_credits and not self.credits_shown:
+                self.debug_log("Displaying credits splash screen")
+                self.renderer.draw_credits(version=self.version)
+                self.credits_shown = True
+                stop_requested.wait(5)  # Show for 5 seconds
+            
+            # Start button monitoring thread if GPIO is available
+            if GPIO_AVAILABLE:
+                button_thread = threading.Thread(target=self.button_monitor, daemon=True)
+                button_thread.start()
+                self.debug_log("Button monitoring thread started")
+            
+            loop_count = 0
+            next_refresh = time.monotonic()
+            while not stop_requested.is_set():
                 # Log heartbeat for first 10 loops
                 if loop_count < 10:
-                    self.debug_log(f"[MAIN LOOP] Iteration {loop_count}")
+                    self.debug_log("[MAIN LOOP] Iteration %s", loop_count)
                 
                 loop_count += 1
                 current_time = time.time()
@@ -520,7 +530,15 @@ class ArgonOLED:
                     screen_name = self.screen_list[self.current_screen]
                     self.display_screen(screen_name)
                 
-                time.sleep(1)
+                # Schedule refreshes from a fixed deadline so drawing time doesn't add drift
+                next_refresh += REFRESH_INTERVAL
+                delay = next_refresh - time.monotonic()
+                if delay > 0:
+                    stop_requested.wait(delay)
+                else:
+                    next_refresh = time.monotonic()
+            
+            print("\nShutting down...")
         
         except KeyboardInterrupt:
             print("\nShutting down...")
@@ -530,6 +548,11 @@ class ArgonOLED:
             self.cleanup()
 
 
+def handle_stop_signal(signum, frame):
+    """Signal handler that asks the main loop to stop so the display gets cleared"""
+    stop_requested.set()
+
+
 def main():
     """Main entry point"""
     # Get configuration from environment variables
@@ -546,6 +569,9 @@ def main():
     
     # Create and run the OLED display
     oled = ArgonOLED(screen_list, switch_duration, temp_unit, debug_logging, show_credits, version)
+    
+    # The Supervisor stops add-ons with SIGTERM; shut down cleanly instead of leaving the last screen lit
+    signal.signal(signal.SIGTERM, handle_stop_signal)
     oled.run()
 
 
@@ -42,4 +42,4 @@ export ADDON_VERSION="${ADDON_VERSION}"
 
 # Run the OLED display script
 bashio::log.info "Starting OLED display service..."
-python3 /argon_oled.py
+exec python3 /argon_oled.py
@@ -5,6 +5,8 @@ Provides methods to get system metrics like CPU, RAM, storage, temperature, etc.
 
 import os
 
+CPU_TEMP_FILE = '/sys/class/thermal/thermal_zone0/temp'
+
 
 class SystemInfo:
     """Handles system information gathering"""
@@ -13,16 +15,27 @@ class SystemInfo:
         self.temp_unit = temp_unit
         self.prev_idle = None
         self.prev_total = None
+        self.cpu_temp_file = None
+        self.fan_hwmon_dir = None
     
     def get_cpu_temp(self):
         """Get CPU temperature"""
         try:
-            with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                temp_c = float(f.read()) / 1000.0
-                if self.temp_unit == 'F':
-                    return (temp_c * 9/5) + 32
-                return temp_c
+            # Keep the sysfs file open and re-read it from the start each time
+            if self.cpu_temp_file is None:
+                self.cpu_temp_file = open(CPU_TEMP_FILE, 'rb', buffering=0)
+            self.cpu_temp_file.seek(0)
+            temp_c = int(self.cpu_temp_file.read()) / 1000.0
+            if self.temp_unit == 'F':
+                return (temp_c * 9/5) + 32
+            return temp_c
         except:
+            if self.cpu_temp_file is not None:
+                try:
+                    self.cpu_temp_file.close()
+                except:
+                    pass
+                self.cpu_temp_file = None
             return 0
     
     def get_cpu_usage(self):
@@ -86,18 +99,12 @@ class SystemInfo:
         except:
             return 0, 0, 0
     
-    def get_fan_speed(self):
-        """Get fan speed from Raspberry Pi 5 native fan connector
-        Returns: dict with 'rpm' (int or None), 'pwm_percent' (int 0-100), 'status' (str)
+    def find_fan_hwmon_dir(self):
+        """Find the hwmon directory of the Raspberry Pi 5 native fan
+        Returns: directory path (str) or None if no fan with a PWM output was found
         """
         import glob
         
-        result = {
-            'rpm': None,
-            'pwm_percent': 0,
-            'status': 'Not Found'
-        }
-        
         try:
             # Find hwmon devices
             hwmon_paths = glob.glob('/sys/class/hwmon/hwmon*/name')
@@ -110,32 +117,53 @@ class SystemInfo:
                     # Look for fan/cooling device (rp1_fan, pwm-fan, cooling_fan, etc.)
                     if any(keyword in device_name.lower() for keyword in ['fan', 'cooling', 'rp1']):
                         hwmon_dir = os.path.dirname(name_file)
-                        
-                        # Try to read RPM (requires tachometer connection)
-                        fan_input = os.path.join(hwmon_dir, 'fan1_input')
-                        if os.path.exists(fan_input):
-                            with open(fan_input, 'r') as f:
-                                result['rpm'] = int(f.read().strip())
-                        
-                        # Read PWM duty cycle (0-255 scale)
-                        pwm_file = os.path.join(hwmon_dir, 'pwm1')
-                        if os.path.exists(pwm_file):
-                            with open(pwm_file, 'r') as f:
-                                pwm_value = int(f.read().strip())
-                                result['pwm_percent'] = int((pwm_value / 255) * 100)
-                                
-                                # Determine status
-                                if result['pwm_percent'] == 0:
-                                    result['status'] = 'Off'
-                                elif result['rpm'] is not None:
-                                    result['status'] = f"{result['rpm']} RPM"
-                                else:
-                                    result['status'] = f"{result['pwm_percent']}%"
-                                
-                                return result
+                        if os.path.exists(os.path.join(hwmon_dir, 'pwm1')):
+                            return hwmon_dir
                 except:
                     continue
         except:
             pass
         
+        return None
+    
+    def get_fan_speed(self):
+        """Get fan speed from Raspberry Pi 5 native fan connector
+        Returns: dict with 'rpm' (int or None), 'pwm_percent' (int 0-100), 'status' (str)
+        """
+        result = {
+            'rpm': None,
+            'pwm_percent': 0,
+            'status': 'Not Found'
+        }
+        
+        # Discover the fan once and reuse it; rediscover if it disappears
+        if self.fan_hwmon_dir is None:
+            self.fan_hwmon_dir = self.find_fan_hwmon_dir()
+            if self.fan_hwmon_dir is None:
+                return result
+        
+        try:
+            # Try to read RPM (requires tachometer connection)
+            fan_input = os.path.join(self.fan_hwmon_dir, 'fan1_input')
+            if os.path.exists(fan_input):
+                with open(fan_input, 'r') as f:
+                    result['rpm'] = int(f.read().strip())
+            
+            # Read PWM duty cycle (0-255 scale)
+            with open(os.path.join(self.fan_hwmon_dir, 'pwm1'), 'r') as f:
+                pwm_value = int(f.read().strip())
+                result['pwm_percent'] = int((pwm_value / 255) * 100)
+            
+            # Determine status
+            if result['pwm_percent'] == 0:
+                result['status'] = 'Off'
+            elif result['rpm'] is not None:
+                result['status'] = f"{result['rpm']} RPM"
+            else:
+                result['status'] = f"{result['pwm_percent']}%"
+        except:
+            self.fan_hwmon_dir = None
+            result['rpm'] = None
+            result['pwm_percent'] = 0
+        
         return result
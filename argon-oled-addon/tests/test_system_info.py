@@ -40,7 +40,17 @@ class TestSystemInfo(unittest.TestCase):
         """Test CPU temperature error handling"""
         temp = self.system_info_c.get_cpu_temp()
         self.assertEqual(temp, 0)
-    
+
+    def test_get_cpu_temp_reuses_file(self):
+        """Test CPU temperature file is opened once and re-read"""
+        with patch('builtins.open') as mock_file:
+            mock_file.return_value.read.side_effect = [b'45000\n', b'46500\n']
+            self.system_info_c.get_cpu_temp()
+            temp = self.system_info_c.get_cpu_temp()
+        self.assertEqual(temp, 46.5)
+        self.assertEqual(mock_file.call_count, 1)
+        mock_file.return_value.seek.assert_called_with(0)
+
     @patch('builtins.open', mock_open(read_data='cpu  100 0 50 850 0 0 0 0 0 0\n'))
     def test_get_cpu_usage_first_call(self):
         """Test CPU usage on first call (should return 0)"""
@@ -127,6 +137,27 @@ class TestSystemInfo(unittest.TestCase):
             self.assertEqual(disk_total, 0)
             self.assertEqual(disk_percent, 0)
 
+    def test_get_fan_speed_reuses_fan_dir(self):
+        """Test fan hwmon directory is discovered once and reused"""
+        with patch.object(self.system_info_c, 'find_fan_hwmon_dir', return_value='/hwmon1') as mock_find, \
+                patch('os.path.exists', return_value=False), \
+                patch('builtins.open', mock_open(read_data='255')):
+            self.system_info_c.get_fan_speed()
+            result = self.system_info_c.get_fan_speed()
+        self.assertEqual(mock_find.call_count, 1)
+        self.assertEqual(result['pwm_percent'], 100)
+        self.assertEqual(result['status'], '100%')
+
+    def test_get_fan_speed_read_error(self):
+        """Test fan directory is forgotten when it can no longer be read"""
+        self.system_info_c.fan_hwmon_dir = '/hwmon1'
+        with patch('os.path.exists', return_value=False), \
+                patch('builtins.open', side_effect=Exception('File not found')):
+            result = self.system_info_c.get_fan_speed()
+        self.assertIsNone(self.system_info_c.fan_hwmon_dir)
+        self.assertEqual(result['status'], 'Not Found')
+        self.assertEqual(result['pwm_percent'], 0)
+
 
 if __name__ == '__main__':
     unittest.main()